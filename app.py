@@ -1,24 +1,83 @@
+import hashlib
+import io
 import json
 import tempfile
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
-from PIL import Image
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from src.receipt_ai.config import OCRConfig, ReceiptAIConfig
+from src.receipt_ai.ocr.easyocr_engine import EasyOCREngine
 from src.receipt_ai.runtime.output import format_result_output
 from src.receipt_ai.runtime.runner import MODE_LABELS, load_runtime_config, resolve_mode, run_extraction
 
 LABEL_TO_MODE = {label: mode for mode, label in MODE_LABELS.items()}
 
 
-def _write_uploaded_file(uploaded_file) -> Path:
-    suffix = Path(uploaded_file.name).suffix or ".png"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as handle:
-        handle.write(uploaded_file.getvalue())
+def _write_image_bytes(image_bytes: bytes, suffix: str) -> Path:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix or ".png") as handle:
+        handle.write(image_bytes)
         return Path(handle.name)
 
 
+def _image_digest(image_bytes: bytes) -> str:
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _preview_bytes(image_digest: str, _image_bytes: bytes, max_width: int = 800) -> bytes:
+    """Downscaled JPEG for the preview pane; the full-resolution upload is kept for extraction."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(_image_bytes)) as image:
+        if image.width <= max_width:
+            return _image_bytes
+        preview = ImageOps.exif_transpose(image).convert("RGB")
+    preview.thumbnail((max_width, max_width * preview.height // max(preview.width, 1)))
+    buffer = io.BytesIO()
+    preview.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_ocr_engine(ocr_key: str, _ocr_config: OCRConfig) -> EasyOCREngine:
+    # One EasyOCR reader per process instead of one per extraction run. The engine is shared by
+    # every session's script thread; EasyOCREngine serializes readtext on its own lock.
+    engine = EasyOCREngine(_ocr_config)
+    engine.warmup()
+    return engine
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _cached_extraction(
+    image_digest: str,
+    mode: str,
+    checkpoint: str,
+    _image_bytes: bytes,
+    _suffix: str,
+    _cfg: ReceiptAIConfig,
+) -> dict:
+    """Run extraction once per (image, mode, checkpoint); reruns reuse the cached payload."""
+    temp_image_path = _write_image_bytes(_image_bytes, _suffix)
+    try:
+        engine = _get_ocr_engine(repr(_cfg.ocr), _cfg.ocr)
+        result = run_extraction(temp_image_path, mode=mode, cfg=_cfg, ocr_engine=engine)
+    finally:
+        temp_image_path.unlink(missing_ok=True)
+    return result.to_dict()
+
+
+def _result_json_bytes(result: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(result, option=orjson.OPT_INDENT_2)
+    return json.dumps(result, indent=2).encode("utf-8")
+
+
 def _show_summary(result: dict) -> None:
     vendor = result.get("vendor", {})
     invoice = result.get("invoice", {})
@@ -48,6 +107,8 @@ def _show_sections(result: dict) -> None:
     with st.expander("Line Items"):
         items = result.get("items", [])
         if items:
+            import pandas as pd
+
             st.dataframe(pd.DataFrame(items), use_container_width=True)
         else:
             st.info("No line items extracted.")
@@ -66,6 +127,14 @@ st.caption("Upload a receipt, run the unified `src/receipt_ai` pipeline, and exp
 
 cfg, runtime_policy = load_runtime_config()
 
+# Load EasyOCR at start-up (once per process) rather than on the first extraction click.
+# A failure here must not take the page down; extraction reports it through the usual error path.
+try:
+    with st.spinner("Loading OCR model..."):
+        _get_ocr_engine(repr(cfg.ocr), cfg.ocr)
+except Exception as exc:
+    st.warning(f"OCR model could not be preloaded; it will be retried on extraction. ({exc})")
+
 with st.sidebar:
     st.header("Default Config")
     st.caption(f"Default mode: {runtime_policy.default_mode}")
@@ -107,12 +176,14 @@ if "history" not in st.session_state:
     st.session_state.history = []
 
 if uploaded:
-    image = Image.open(uploaded).convert("RGB")
+    image_bytes = uploaded.getvalue()
+    image_digest = _image_digest(image_bytes)
 
     top_left, top_right = st.columns([1, 1])
     with top_left:
         st.subheader("Input Image")
-        st.image(image, use_container_width=True)
+        # Cached bytes, so Streamlit does not re-encode a full-resolution image on every rerun.
+        st.image(_preview_bytes(image_digest, image_bytes), use_container_width=True)
 
     with top_right:
         st.subheader("Extraction Mode")
@@ -154,12 +225,18 @@ if uploaded:
     st.caption(f"Fallback behavior: {runtime_policy.fallback_mode_on_model_failure}")
 
     if run_pipeline:
-        temp_image_path = _write_uploaded_file(uploaded)
         output_key = f"{uploaded.name}|{selected_mode}|{effective_mode}|{layout_model_path}|{output_mode}|{int(include_confidence)}|{int(include_provenance)}"
 
         with st.spinner(f"Running {MODE_LABELS.get(effective_mode, effective_mode)}..."):
             try:
-                result = run_extraction(temp_image_path, mode=effective_mode, cfg=cfg)
+                result = _cached_extraction(
+                    image_digest,
+                    effective_mode,
+                    checkpoint_used,
+                    image_bytes,
+                    Path(uploaded.name).suffix,
+                    cfg,
+                )
                 result_dict = format_result_output(
                     result,
                     output_mode=output_mode,
@@ -192,7 +269,7 @@ if uploaded:
 
         st.download_button(
             "Download Extraction JSON",
-            data=json.dumps(pipeline_result, indent=2),
+            data=_result_json_bytes(pipeline_result),
             file_name=f"receipt_{effective_mode}_result.json",
             mime="application/json",
         )
@@ -202,6 +279,8 @@ if uploaded:
     st.divider()
 
     if st.button("Add Current Result To Session History"):
+        import pandas as pd
+
         st.session_state.history.append(
             {
                 "file": uploaded.name,
@@ -213,6 +292,8 @@ if uploaded:
         st.success("Added to history.")
 
     if st.session_state.history:
+        import pandas as pd
+
         st.subheader("Session History")
         history_df = pd.DataFrame(st.session_state.history)
         st.dataframe(history_df, use_container_width=True)
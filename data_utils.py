@@ -181,8 +181,12 @@ def read_image_rgb(image_path: Path) -> np.ndarray:
 
 
 def run_easyocr_on_image(image_rgb: np.ndarray, ocr_mode: str = "none") -> list[dict[str, Any]]:
-    processed, _ = preprocess_for_ocr(image_rgb, mode=ocr_mode)
-    return run_easyocr(processed)
+    processed, debug = preprocess_for_ocr(image_rgb, mode=ocr_mode)
+    batch = run_easyocr(processed)
+    if debug["scale"] != 1.0:
+        # Boxes come back in processed-image pixels; callers normalize against the original size.
+        batch.bboxes /= debug["scale"]
+    return batch.to_list_of_dicts()
 
 
 def canonical_entity_key(raw_key: str) -> str | None:
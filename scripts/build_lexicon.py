@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from collections import Counter
 import re
 import argparse
+import json
+import os
 
 
 WORD_RE = re.compile(r"[A-Za-z]{3,}")  # words length >= 3
 
+# Bump when tokenization changes so stale per-file counts are not reused.
+CACHE_VERSION = 1
+
 
 def read_sroie_box_text(box_file: Path) -> str:
     """
@@ -15,16 +21,16 @@ def read_sroie_box_text(box_file: Path) -> str:
       x1,y1,x2,y2,x3,y3,x4,y4,transcription
     transcription may contain commas -> take parts[8:]
     """
-    lines = box_file.read_text(encoding="utf-8", errors="ignore").splitlines()
+    lines = box_file.read_bytes().decode("utf-8", errors="ignore").splitlines()
     texts = []
     for line in lines:
         line = line.strip()
         if not line:
             continue
-        parts = line.split(",")
+        parts = line.split(",", 8)
         if len(parts) < 9:
             continue
-        transcription = ",".join(parts[8:]).strip()
+        transcription = parts[8].strip()
         if transcription:
             texts.append(transcription)
     return "\n".join(texts)
@@ -35,6 +41,24 @@ def tokenize(text: str) -> list[str]:
     return [w.lower() for w in WORD_RE.findall(text)]
 
 
+def count_file_tokens(box_file: Path) -> Counter:
+    """Token counts for one box file (process-pool worker)."""
+    return Counter(tokenize(read_sroie_box_text(box_file)))
+
+
+def load_count_cache(cache_path: Path) -> dict:
+    """Per-file cache: {path: {"mtime", "size", "counts"}}; empty when missing or stale."""
+    if not cache_path.exists():
+        return {}
+    try:
+        payload = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if payload.get("version") != CACHE_VERSION:
+        return {}
+    return payload.get("files", {})
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument(
@@ -61,6 +85,18 @@ def main():
         default=50000,
         help="Max number of tokens to write (most common first)",
     )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes used to tokenize box files",
+    )
+    p.add_argument(
+        "--cache",
+        type=str,
+        default=None,
+        help="Per-file token count cache (default: <out>.cache.json); only changed box files are re-tokenized",
+    )
     args = p.parse_args()
 
     box_dir = Path(args.box_dir)
@@ -71,20 +107,43 @@ def main():
     if not files:
         raise FileNotFoundError(f"No .txt files found in: {box_dir}")
 
+    out_path = Path(args.out)
+    cache_path = Path(args.cache) if args.cache else out_path.with_suffix(".cache.json")
+    cache = load_count_cache(cache_path)
+
+    per_file: dict[str, dict] = {}
+    stale: list[Path] = []
+    for f in files:
+        st = f.stat()
+        entry = cache.get(str(f))
+        if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+            per_file[str(f)] = entry
+        else:
+            per_file[str(f)] = {"mtime": st.st_mtime, "size": st.st_size, "counts": {}}
+            stale.append(f)
+
+    print(f"Reusing cached counts for {len(files) - len(stale)}/{len(files)} box files.")
+    if stale:
+        with ProcessPoolExecutor(max_workers=max(args.workers, 1)) as ex:
+            for i, (f, file_counts) in enumerate(zip(stale, ex.map(count_file_tokens, stale, chunksize=64)), start=1):
+                per_file[str(f)]["counts"] = dict(file_counts)
+                if i % 200 == 0:
+                    print(f"Processed {i}/{len(stale)} box files...")
+
+    # Merge in file order so frequency ties keep a stable output order.
     counts = Counter()
+    for f in files:
+        counts.update(per_file[str(f)]["counts"])
 
-    for i, f in enumerate(files, start=1):
-        txt = read_sroie_box_text(f)
-        counts.update(tokenize(txt))
-        if i % 200 == 0:
-            print(f"Processed {i}/{len(files)} box files...")
+    if stale or set(cache) != set(per_file):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps({"version": CACHE_VERSION, "files": per_file}), encoding="utf-8")
 
     # Filter + limit
     items = [(w, c) for w, c in counts.items() if c >= args.min_freq]
     items.sort(key=lambda x: x[1], reverse=True)
     items = items[: args.max_words]
 
-    out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     # SymSpell dictionary format: "term frequency" per line
@@ -1,10 +1,17 @@
 # src/app/extract_fields.py
 from __future__ import annotations
 
+from bisect import bisect_right
+from itertools import accumulate
 import re
 from typing import Optional, List
 import warnings
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 
 warnings.warn(
     "src.app.extract_fields is deprecated. Use src.receipt_ai.parsing and src.receipt_ai.schemas instead.",
@@ -21,11 +28,50 @@ def _safe_text(text) -> str:
 
 
 def _dedup_preserve_order(items: List[str]) -> List[str]:
-    out = []
-    for x in items:
-        if x not in out:
-            out.append(x)
-    return out
+    return list(dict.fromkeys(items))
+
+
+# ASCII bytes that are not letters; deleting them leaves only the letters to count.
+_NON_ALPHA_ASCII = bytes(c for c in range(128) if not chr(c).isalpha())
+
+
+def _alpha_count(text: str) -> int:
+    if text.isascii():
+        return len(text.encode("ascii").translate(None, _NON_ALPHA_ASCII))
+    return sum(ch.isalpha() for ch in text)
+
+
+def _build_automaton(keywords: List[str]):
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for rank, kw in enumerate(keywords):
+        automaton.add_word(kw, rank)
+    automaton.make_automaton()
+    return automaton
+
+
+def _best_rank_per_line(upper_text: str, automaton, pattern: re.Pattern, rank: dict) -> List[Optional[int]]:
+    """
+    Lowest keyword rank found on each line of newline-joined, uppercased text (None when no hit).
+    Uses one Aho-Corasick sweep over the whole text when pyahocorasick is installed.
+    """
+    upper_lines = upper_text.split("\n")
+    best: List[Optional[int]] = [None] * len(upper_lines)
+    if automaton is None:
+        for i, up in enumerate(upper_lines):
+            ranks = [rank[m.group(1)] for m in pattern.finditer(up)]
+            if ranks:
+                best[i] = min(ranks)
+        return best
+
+    # Keywords never contain a newline, so every hit stays inside one line.
+    starts = list(accumulate((len(up) + 1 for up in upper_lines[:-1]), initial=0))
+    for end_idx, kw_rank in automaton.iter(upper_text):
+        i = bisect_right(starts, end_idx) - 1
+        if best[i] is None or kw_rank < best[i]:
+            best[i] = kw_rank
+    return best
 
 
 # ----------------------------
@@ -36,6 +82,7 @@ DATE_PATTERNS = [
     r"\b(\d{2}[/-]\d{2}[/-]\d{2,4})\b",
     r"\b(\d{4}[/-]\d{2}[/-]\d{2})\b",
 ]
+_DATE_RES = [re.compile(p) for p in DATE_PATTERNS]
 
 # Money-like number (accepts 56.80 or 56,80)
 # We intentionally do NOT match pure integers to avoid picking quantities like "5"
@@ -44,6 +91,12 @@ MONEY_RE = re.compile(r"\b(\d{1,6}[.,]\d{2})\b")
 # Time like 09.21 or 09:21 (avoid mistakenly treating as money)
 TIMEISH_RE = re.compile(r"\b([01]?\d|2[0-3])[:.][0-5]\d\b")
 
+# MONEY_RE with time-like tokens rejected in the same scan: the time branch is tried
+# first and consumes exactly the span MONEY_RE would have matched, but captures nothing.
+# Expects commas already normalized to dots.
+_MONEY_NOT_TIME_RE = re.compile(r"\b(?:(?:[01]?\d|2[0-3])\.[0-5]\d\b|(\d{1,6}\.\d{2})\b)")
+_COMMA_TO_DOT = str.maketrans(",", ".")
+
 # Lines that typically contain "final" totals (priority order)
 TOTAL_LINE_HINTS = [
     "ROUNDED TOTAL",
@@ -58,6 +111,10 @@ TOTAL_LINE_HINTS = [
     "CASH",
     "CHANGE",
 ]
+# One overlapping scan per line; each position reports the highest-priority hint starting there.
+_TOTAL_HINT_RE = re.compile("(?=(" + "|".join(re.escape(h) for h in TOTAL_LINE_HINTS) + "))")
+_TOTAL_HINT_RANK = {h: i for i, h in enumerate(TOTAL_LINE_HINTS)}
+_TOTAL_HINT_AC = _build_automaton(TOTAL_LINE_HINTS)
 
 
 # Merchant stopwords (don’t pick these as merchant lines)
@@ -65,17 +122,22 @@ MERCHANT_BAD = {
     "TOTAL", "SUBTOTAL", "SUB TOTAL", "INVOICE", "TAX", "GST", "THANK", "CHANGE",
     "CASH", "AMOUNT", "PAYABLE", "DATE", "TEL", "FAX", "EMAIL"
 }
+_MERCHANT_BAD_WORDS = sorted(MERCHANT_BAD)
+_MERCHANT_BAD_RE = re.compile("(?=(" + "|".join(re.escape(w) for w in _MERCHANT_BAD_WORDS) + "))")
+_MERCHANT_BAD_RANK = {w: i for i, w in enumerate(_MERCHANT_BAD_WORDS)}
+_MERCHANT_BAD_AC = _build_automaton(_MERCHANT_BAD_WORDS)
 
 
 # ----------------------------
 # Public API
 # ----------------------------
 def extract_date(text: Optional[str]) -> Optional[str]:
-    t = _safe_text(text).upper()
+    # Date patterns are digits/separators only, so no uppercase copy is needed.
+    t = _safe_text(text)
     if not t:
         return None
-    for pat in DATE_PATTERNS:
-        m = re.search(pat, t)
+    for pat in _DATE_RES:
+        m = pat.search(t)
         if m:
             return m.group(1)
     return None
@@ -99,18 +161,22 @@ def extract_totals(text: Optional[str]) -> List[str]:
         lines = [raw.strip()]
 
     # 1) Keyword/Hint line pass (best signal)
-    candidates: List[str] = []
-    upper_lines = [(ln, ln.upper()) for ln in lines]
-
-    for hint in TOTAL_LINE_HINTS:
-        for ln, up in upper_lines:
-            if hint in up:
-                for m in MONEY_RE.finditer(ln.replace(",", ".")):  # normalize comma decimal for matching
-                    val = m.group(1).replace(",", ".")
-                    # exclude time-like numbers such as 09.21
-                    if TIMEISH_RE.fullmatch(val):
-                        continue
-                    candidates.append(val)
+    # Rank each line by the best hint it contains; a stable sort on rank keeps
+    # line and in-line order, matching a hint-major scan without the nested loop.
+    ranked: List[tuple[int, str]] = []
+    # Uppercase once for all lines instead of one copy per line.
+    upper_text = "\n".join(lines).upper()
+    line_ranks = _best_rank_per_line(upper_text, _TOTAL_HINT_AC, _TOTAL_HINT_RE, _TOTAL_HINT_RANK)
+    for ln, rank in zip(lines, line_ranks):
+        if rank is None:
+            continue
+        # normalize comma decimal for matching; time-like numbers such as 09.21 never capture
+        for m in _MONEY_NOT_TIME_RE.finditer(ln.translate(_COMMA_TO_DOT)):
+            if m.group(1):
+                ranked.append((rank, m.group(1)))
+
+    ranked.sort(key=lambda item: item[0])
+    candidates = [val for _, val in ranked]
 
     candidates = _dedup_preserve_order(candidates)
     if candidates:
@@ -118,12 +184,10 @@ def extract_totals(text: Optional[str]) -> List[str]:
 
     # 2) Fallback: any money-like token in text (still excluding time-ish)
     fallback: List[str] = []
-    norm = raw.replace(",", ".")
-    for m in MONEY_RE.finditer(norm):
-        val = m.group(1)
-        if TIMEISH_RE.fullmatch(val):
-            continue
-        fallback.append(val)
+    norm = raw.translate(_COMMA_TO_DOT)
+    for m in _MONEY_NOT_TIME_RE.finditer(norm):
+        if m.group(1):
+            fallback.append(m.group(1))
 
     return _dedup_preserve_order(fallback)
 
@@ -143,14 +207,15 @@ def guess_merchant(text: Optional[str]) -> Optional[str]:
     if not lines:
         # If no line breaks, just take the first ~60 chars that contain letters
         t2 = t.strip()
-        return t2[:60] if any(ch.isalpha() for ch in t2) else None
+        return t2[:60] if _alpha_count(t2) else None
 
-    for ln in lines[:12]:
-        up = ln.upper()
-        if any(bad in up for bad in MERCHANT_BAD):
+    head = lines[:12]
+    bad_ranks = _best_rank_per_line("\n".join(head).upper(), _MERCHANT_BAD_AC, _MERCHANT_BAD_RE, _MERCHANT_BAD_RANK)
+    for ln, bad in zip(head, bad_ranks):
+        if bad is not None:
             continue
         # require at least 3 letters to avoid codes
-        if sum(ch.isalpha() for ch in ln) >= 3:
+        if _alpha_count(ln) >= 3:
             return ln[:60]
 
     return None
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 import re
 from pathlib import Path
 from typing import Optional
@@ -23,34 +24,42 @@ except ImportError:
 # -------------------------
 # Safe normalization (generic)
 # -------------------------
-def normalize_text_light(text: str) -> str:
-    t = text
-
-    # Time: 17:09;21 -> 17:09:21
-    t = re.sub(r"(\d{1,2}):(\d{2})[;](\d{2})", r"\1:\2:\3", t)
-
-    # Comma decimals: 38,90 -> 38.90
-    t = re.sub(r"(\d)\s*,\s*(\d{2})\b", r"\1.\2", t)
-
-    # Broken decimals: 11,.10 -> 11.10
-    t = re.sub(r"(\d)\s*,\.\s*(\d{2})\b", r"\1.\2", t)
+# One alternation per cleaner instead of a chain of re.sub passes; branches keep the old pass order.
+_TIME_FIX = r"(?P<time>\d{1,2}:\d{2};\d{2})"            # 17:09;21 -> 17:09:21
+_DECIMAL_FIX = r"(?P<dec>\d\s*,\.?\s*\d{2}\b)"          # 38,90 / 11,.10 -> 38.90 / 11.10
+_POSSESSIVE_FIX = r"(?P<poss>\b[A-Za-z]+\s*'\s*s\b)"     # McDonald ' s -> McDonald's
+_PUNCT_SPACE_FIX = r"(?P<punct>\s+[,.;:])"                # drop spaces before punctuation
+
+_LIGHT_FUSED_RE = re.compile(
+    "|".join([_TIME_FIX, _DECIMAL_FIX, _POSSESSIVE_FIX, _PUNCT_SPACE_FIX, r"(?P<ws>\s{2,})"])
+)
+# Per-line variant: no possessive fix, and only spaces/tabs collapse (never newlines).
+_LINE_FUSED_RE = re.compile("|".join([_TIME_FIX, _DECIMAL_FIX, _PUNCT_SPACE_FIX, r"(?P<ws>[ \t]{2,})"]))
 
-    # Normalize possessives: McDonald ' s -> McDonald's (generic)
-    t = re.sub(r"\b([A-Za-z]+)\s*'\s*s\b", r"\1's", t)
 
-    # Remove spaces before punctuation
-    t = re.sub(r"\s+([,.;:])", r"\1", t)
+def _fused_fix(m: re.Match) -> str:
+    s = m.group(0)
+    kind = m.lastgroup
+    if kind == "time":
+        return s.replace(";", ":")
+    if kind == "dec":
+        return f"{s[0]}.{s[-2:]}"
+    if kind == "poss":
+        return s.split("'", 1)[0].rstrip() + "'s"
+    if kind == "punct":
+        return s[-1]
+    return " "
 
-    # Collapse whitespace
-    t = re.sub(r"\s{2,}", " ", t)
 
-    return t.strip()
+def normalize_text_light(text: str) -> str:
+    return _LIGHT_FUSED_RE.sub(_fused_fix, text).strip()
 
 
 # -------------------------
 # Lexicon correction (data-driven)
 # -------------------------
-_WORD_RE = re.compile(r"[A-Za-z]{3,}")  # only correct word-like tokens length >= 3
+# Whole letter runs of length >= 4 only: shorter words and digit-bearing tokens are never corrected.
+_WORD_RE = re.compile(r"(?<![A-Za-z])[A-Za-z]{4,}(?![A-Za-z])")
 
 _symspell_singleton: Optional[SymSpell] = None
 
@@ -67,6 +76,13 @@ def _load_symspell(lexicon_dict_path: str | Path, max_edit_distance: int = 2) ->
     return sym
 
 
+@lru_cache(maxsize=8192)
+def _sym_lookup(sym: SymSpell, w_lower: str, max_edit_distance: int) -> Optional[str]:
+    # Receipt words repeat heavily (TOTAL, CASH, ...); SymSpell lookups are the hot cost.
+    suggestions = sym.lookup(w_lower, Verbosity.TOP, max_edit_distance=max_edit_distance)
+    return suggestions[0].term if suggestions else None
+
+
 def _preserve_case(original: str, corrected: str) -> str:
     if not corrected:
         return original
@@ -80,26 +96,29 @@ def _preserve_case(original: str, corrected: str) -> str:
 def correct_with_lexicon(text: str, sym: SymSpell, max_edit_distance: int = 2) -> str:
     """
     Correct tokens using SymSpell TOP suggestion.
-    Keeps numbers/currency untouched by only targeting [A-Za-z]{3,}.
+    Keeps numbers/currency untouched by only targeting letter runs of 4+ chars.
     """
+    corrected: dict[str, str] = {}
+
     def repl(match: re.Match) -> str:
         w = match.group(0)
+        if w in corrected:
+            return corrected[w]
+        corrected[w] = out = _correct_word(w)
+        return out
 
-        # --- Guards: don't "spell-correct" IDs/acronyms/brand blocks ---
-        if any(ch.isdigit() for ch in w):
-            return w
+    def _correct_word(w: str) -> str:
+        # --- Guard: don't "spell-correct" acronyms/brand blocks ---
         if w.isupper():              # CROSS, CHANNEL, SDN, BHD
             return w
-        if len(w) < 4:
-            return w
 
-        suggestions = sym.lookup(w.lower(), Verbosity.TOP, max_edit_distance=max_edit_distance)
-        if not suggestions:
+        best = _sym_lookup(sym, w.lower(), max_edit_distance)
+        if best is None:
             return w
 
-        best = suggestions[0].term
         return _preserve_case(w, best)
 
+    return _WORD_RE.sub(repl, text)
 
 
 def clean_ocr_text(text: str, *args, **kwargs) -> str:
@@ -117,14 +136,8 @@ def clean_ocr_text(text: str, *args, **kwargs) -> str:
         ln2 = ln
 
         # --- keep whatever normalization you already do, but DO NOT use \s to collapse everything ---
-        # Example safe normalizations (keep yours if you already have them):
-        ln2 = re.sub(r"(\d{1,2}):(\d{2})[;](\d{2})", r"\1:\2:\3", ln2)
-        ln2 = re.sub(r"(\d)\s*,\s*(\d{2})\b", r"\1.\2", ln2)
-        ln2 = re.sub(r"(\d)\s*,\.\s*(\d{2})\b", r"\1.\2", ln2)
-        ln2 = re.sub(r"\s+([,.;:])", r"\1", ln2)
-
-        # Collapse spaces/tabs ONLY (not newlines)
-        ln2 = re.sub(r"[ \t]{2,}", " ", ln2).strip()
+        # Time/decimal fixes, spaces before punctuation, and space/tab collapse in one pass.
+        ln2 = _LINE_FUSED_RE.sub(_fused_fix, ln2).strip()
 
         cleaned_lines.append(ln2)
 
@@ -1,6 +1,7 @@
 import argparse
 from pathlib import Path
 import cv2
+import numpy as np
 
 from src.preprocess import preprocess_for_ocr
 from src.ocr_engine import run_easyocr, best_text
@@ -29,9 +30,11 @@ def main():
     chosen_text, chosen_conf = best_text(results)
 
     print("=== OCR RESULTS (top 5) ===")
-    if results:
-        for i, r in enumerate(sorted(results, key=lambda x: x["conf"], reverse=True)[:5], start=1):
-            print(f"{i}. conf={r['conf']:.3f} text={r['text']}")
+    if len(results):
+        # stable descending order, matching the previous sorted(..., reverse=True)
+        top = np.argsort(-results.confs, kind="stable")[:5]
+        for i, j in enumerate(top, start=1):
+            print(f"{i}. conf={results.confs[j]:.3f} text={results.texts[j]}")
     else:
         print("No text detected.")
 
@@ -1,25 +1,80 @@
+import threading
+from dataclasses import dataclass
+
 import numpy as np
 import easyocr
 
 _reader = None
+# Guards reader creation and readtext: one EasyOCR model instance is not safe to call concurrently.
+_reader_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class OcrBatch:
+    """EasyOCR detections as parallel arrays: texts[i], confs[i] and bboxes[i] (4x2 quad) describe one line."""
+
+    texts: list[str]
+    confs: np.ndarray
+    bboxes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def to_list_of_dicts(self) -> list[dict]:
+        """Legacy row format: [{"text", "conf", "bbox"}, ...]."""
+        return [
+            {"text": text, "conf": float(conf), "bbox": bbox.tolist()}
+            for text, conf, bbox in zip(self.texts, self.confs, self.bboxes)
+        ]
+
 
 def get_reader() -> easyocr.Reader:
     global _reader
     if _reader is None:
-        _reader = easyocr.Reader(["en"], gpu=False)
+        with _reader_lock:
+            if _reader is None:
+                _reader = easyocr.Reader(["en"], gpu=False)
     return _reader
 
-def run_easyocr(img_gray_or_bin: np.ndarray) -> list[dict]:
+def _to_batch(results: list) -> OcrBatch:
+    texts = []
+    confs = []
+    bboxes = []
+    for bbox, text, conf in results:
+        texts.append(text)
+        confs.append(conf)
+        bboxes.append(bbox)
+    return OcrBatch(
+        texts=texts,
+        confs=np.asarray(confs, dtype=np.float64),
+        bboxes=np.asarray(bboxes, dtype=np.float32).reshape(-1, 4, 2),
+    )
+
+
+def run_easyocr(img_gray_or_bin: np.ndarray) -> OcrBatch:
     reader = get_reader()
-    results = reader.readtext(img_gray_or_bin)
+    with _reader_lock:
+        results = reader.readtext(img_gray_or_bin)
+    return _to_batch(results)
 
-    parsed = []
-    for bbox, text, conf in results:
-        parsed.append({"text": text, "conf": float(conf), "bbox": bbox})
-    return parsed
 
-def best_text(results: list[dict]) -> tuple[str, float]:
-    if not results:
+def run_easyocr_batch(images: list[np.ndarray], batch_size: int = 8) -> list[OcrBatch]:
+    """
+    OCR several same-sized images in one `readtext_batched` call (e.g. the preprocessing
+    variants of one page), so detector/recognizer batches are shared across them.
+    """
+    if len(images) == 1:
+        return [run_easyocr(images[0])]
+    if len({img.shape for img in images}) > 1:
+        raise ValueError("run_easyocr_batch expects images of identical shape")
+
+    reader = get_reader()
+    with _reader_lock:
+        results_list = reader.readtext_batched(images, batch_size=batch_size)
+    return [_to_batch(results) for results in results_list]
+
+def best_text(batch: OcrBatch) -> tuple[str, float]:
+    if not len(batch):
         return "", 0.0
-    best = max(results, key=lambda r: r["conf"])
-    return best["text"], best["conf"]
+    i = int(batch.confs.argmax())
+    return batch.texts[i], float(batch.confs[i])
@@ -2,8 +2,21 @@
 import cv2
 import numpy as np
 
+from src.preprocess_numba import threshold_and_close
 
-def preprocess_for_ocr(img_bgr: np.ndarray, mode: str = "clahe") -> tuple[np.ndarray, dict]:
+# Closing kernel for the adaptive mode; built once instead of on every call.
+_CLOSE_KERNEL = np.ones((2, 2), np.uint8)
+# Longest side fed to OCR; larger receipts are downscaled first (EasyOCR gains nothing above this).
+MAX_SIDE = 1600
+
+
+def preprocess_for_ocr(
+    img_bgr: np.ndarray,
+    mode: str = "clahe",
+    max_side: int | None = MAX_SIDE,
+    green_channel: bool = False,
+    fused_threshold: bool = False,
+) -> tuple[np.ndarray, dict]:
     """
     Preprocess image for OCR.
     Modes:
@@ -13,17 +26,37 @@ def preprocess_for_ocr(img_bgr: np.ndarray, mode: str = "clahe") -> tuple[np.nda
       - otsu: blur + Otsu threshold (can be harsh)
       - adaptive: denoise + adaptive threshold + morphology (often harsh on receipts)
 
+    Images whose longest side exceeds `max_side` are downscaled first (None disables).
+    debug_info["scale"] is the factor applied; divide OCR coordinates by it to map them
+    back onto the input image.
+    green_channel=True uses the G plane as the grayscale image instead of a luma conversion
+    (near-identical on dark-ink receipts; the same index works for RGB and BGR input).
+    fused_threshold=True runs the adaptive mode's threshold + close as one Numba kernel
+    (src/preprocess_numba.py, same output); ignored when numba isn't installed.
+
     Returns: processed_image (uint8), debug_info
     """
-    debug = {"mode": mode}
+    scale = 1.0
+    if max_side and max(img_bgr.shape[:2]) > max_side:
+        scale = max_side / max(img_bgr.shape[:2])
+        img_bgr = cv2.resize(img_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    debug = {"mode": mode, "scale": scale}
 
-    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+    if img_bgr.ndim == 2:
+        gray = img_bgr
+    elif green_channel:
+        gray = cv2.extractChannel(img_bgr, 1)
+    else:
+        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
 
     if mode == "none":
         return gray, debug
 
+    # OpenCV's NL-means costs roughly O(searchWindowSize²) per pixel (template distances are
+    # updated incrementally), so 11 vs the default 21 is ~3.6x cheaper (21² / 11²); the smaller
+    # 5x5 template still cleans up receipt speckle.
     if mode == "denoise":
-        den = cv2.fastNlMeansDenoising(gray, h=15, templateWindowSize=7, searchWindowSize=21)
+        den = cv2.fastNlMeansDenoising(gray, h=15, templateWindowSize=5, searchWindowSize=11)
         return den, debug
 
     if mode == "clahe":
@@ -37,17 +70,22 @@ def preprocess_for_ocr(img_bgr: np.ndarray, mode: str = "clahe") -> tuple[np.nda
         return th, debug
 
     if mode == "adaptive":
-        denoised = cv2.fastNlMeansDenoising(gray, h=20, templateWindowSize=7, searchWindowSize=21)
+        denoised = cv2.fastNlMeansDenoising(gray, h=20, templateWindowSize=5, searchWindowSize=11)
+        if fused_threshold and threshold_and_close is not None:
+            # Opt-in: on one thread it benchmarks level with OpenCV, not faster. Uses the same
+            # thread budget as OpenCV so it stays single-threaded inside eval pool workers.
+            return threshold_and_close(denoised, 31, 10, n_threads=cv2.getNumThreads()), debug
+
+        # Mean (box-filter) threshold: O(1) per pixel via running sums, vs a 31x31 Gaussian.
         thr = cv2.adaptiveThreshold(
             denoised,
             255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.ADAPTIVE_THRESH_MEAN_C,
             cv2.THRESH_BINARY,
             31,
             10,
         )
-        kernel = np.ones((2, 2), np.uint8)
-        processed = cv2.morphologyEx(thr, cv2.MORPH_CLOSE, kernel, iterations=1)
+        processed = cv2.morphologyEx(thr, cv2.MORPH_CLOSE, _CLOSE_KERNEL, iterations=1)
         return processed, debug
 
     raise ValueError(f"Unknown mode: {mode}")
@@ -0,0 +1,108 @@
+# src/preprocess_numba.py
+"""
+Optional Numba kernels for preprocess.py.
+
+`threshold_and_close` is None when numba isn't installed; callers fall back to OpenCV.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+_prange = numba.prange if numba is not None else range
+
+
+def _threshold_and_close(src: np.ndarray, out: np.ndarray, block_size: int, c: int, n_bands: int) -> None:
+    """
+    Mean adaptive threshold (THRESH_BINARY) + 2x2 MORPH_CLOSE, fused into one sweep per band.
+
+    Matches cv2.adaptiveThreshold(..., ADAPTIVE_THRESH_MEAN_C, THRESH_BINARY, block_size, c)
+    followed by cv2.morphologyEx(MORPH_CLOSE, np.ones((2, 2))): the box mean uses replicated
+    borders, and both morphology steps read the pixel and its up/left neighbours, ignoring
+    pixels outside the image.
+
+    Rows are split into `n_bands` bands (one per thread). Each band keeps running column sums
+    plus rolling 3-row threshold / 2-row dilation buffers, so every threshold row is computed
+    once (plus a 2-row halo per band) and nothing page-sized is allocated besides `out`.
+    """
+    h, w = src.shape
+    r = block_size // 2
+    area = block_size * block_size
+    band_h = (h + n_bands - 1) // n_bands
+    for b in _prange(n_bands):
+        y0 = b * band_h
+        y1 = min(h, y0 + band_h)
+        if y0 >= y1:
+            continue
+
+        colsum = np.zeros(w, np.int32)
+        thr = np.zeros((3, w), np.uint8)
+        dil = np.zeros((2, w), np.uint8)
+
+        start = max(y0 - 2, 0)
+        for k in range(-r, r + 1):
+            yy = min(max(start + k, 0), h - 1)
+            for x in range(w):
+                colsum[x] += np.int32(src[yy, x])
+
+        for yy in range(start, y1):
+            if yy > start:
+                add = min(yy + r, h - 1)
+                sub = max(yy - r - 1, 0)
+                for x in range(w):
+                    colsum[x] += np.int32(src[add, x]) - np.int32(src[sub, x])
+
+            # Threshold row yy from a sliding horizontal sum over the column sums.
+            t = thr[yy % 3]
+            s = 0
+            for j in range(-r, r + 1):
+                s += colsum[min(max(j, 0), w - 1)]
+            for x in range(w):
+                if x > 0:
+                    s += colsum[min(x + r, w - 1)] - colsum[max(x - r - 1, 0)]
+                # src - round(s / area) > -c, without the division: floor(a / b) < k  <=>  a < k * b.
+                t[x] = 255 if 2 * s + area < 2 * area * (np.int32(src[yy, x]) + c) else 0
+
+            # Dilate row yy (rows yy-1..yy of the threshold).
+            tp = thr[(yy - 1) % 3]
+            d = dil[yy % 2]
+            for x in range(w):
+                v = t[x]
+                if yy >= 1:
+                    v = max(v, tp[x])
+                if x >= 1:
+                    v = max(v, t[x - 1])
+                    if yy >= 1:
+                        v = max(v, tp[x - 1])
+                d[x] = v
+
+            # Erode into the output (rows yy-1..yy of the dilation); halo rows only feed buffers.
+            if yy < y0:
+                continue
+            dp = dil[(yy - 1) % 2]
+            for x in range(w):
+                v = d[x]
+                if yy >= 1:
+                    v = min(v, dp[x])
+                if x >= 1:
+                    v = min(v, d[x - 1])
+                    if yy >= 1:
+                        v = min(v, dp[x - 1])
+                out[yy, x] = v
+
+
+if numba is not None:
+    _threshold_and_close_jit = numba.njit(parallel=True, cache=True)(_threshold_and_close)
+
+    def threshold_and_close(src: np.ndarray, block_size: int = 31, c: int = 10, n_threads: int = 1) -> np.ndarray:
+        """Run the fused kernel on `n_threads` numba threads (callers pass their OpenCV thread budget)."""
+        n = max(1, min(n_threads, numba.config.NUMBA_NUM_THREADS))
+        numba.set_num_threads(n)
+        out = np.empty_like(src)
+        _threshold_and_close_jit(np.ascontiguousarray(src), out, block_size, c, n)
+        return out
+
+else:
+    threshold_and_close = None
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+import threading
 from typing import Any
 
 import numpy as np
@@ -24,19 +25,34 @@ class OCRExtraction:
 
 
 class EasyOCREngine:
-    """Reusable EasyOCR wrapper that returns schema-based lines and tokens."""
+    """
+    Reusable EasyOCR wrapper that returns schema-based lines and tokens.
+
+    One instance may be shared across threads (e.g. Streamlit sessions): reader creation and
+    readtext calls are serialized on a per-instance lock, since a single EasyOCR model is not
+    safe to call concurrently.
+    """
 
     def __init__(self, config: OCRConfig | None = None) -> None:
         self.config = config or OCRConfig()
         self._reader = None
+        self._lock = threading.Lock()
 
     def _get_reader(self):
         if self._reader is None:
-            import easyocr
+            with self._lock:
+                if self._reader is None:
+                    import easyocr
 
-            self._reader = easyocr.Reader(list(self.config.languages), gpu=self.config.gpu)
+                    self._reader = easyocr.Reader(list(self.config.languages), gpu=self.config.gpu)
         return self._reader
 
+    def warmup(self) -> None:
+        """Load the reader and run one tiny forward pass so the first real call skips model start-up."""
+        reader = self._get_reader()
+        with self._lock:
+            reader.readtext(np.zeros((32, 32), dtype=np.uint8))
+
     @staticmethod
     def load_image(image_path: str | Path) -> tuple[np.ndarray, int, int, Path]:
         path = Path(image_path).expanduser().resolve()
@@ -52,12 +68,13 @@ class EasyOCREngine:
         image_rgb, width, height, path = self.load_image(image_path)
         reader = self._get_reader()
 
-        raw_results = reader.readtext(
-            image_rgb,
-            detail=1,
-            paragraph=self.config.paragraph,
-            width_ths=self.config.width_ths,
-        )
+        with self._lock:
+            raw_results = reader.readtext(
+                image_rgb,
+                detail=1,
+                paragraph=self.config.paragraph,
+                width_ths=self.config.width_ths,
+            )
 
         if not raw_results:
             return OCRExtraction(
@@ -75,8 +92,10 @@ class EasyOCREngine:
 
         lines: list[OCRLine] = []
         tokens: list[OCRToken] = []
+        confs = np.empty(len(rows), dtype=np.float64)
 
         for i, row in enumerate(rows):
+            confs[i] = row["conf"]
             line_tokens = self._split_line_into_tokens(row["text"], row["bbox"], row["conf"], line_id=i)
             line = OCRLine(
                 line_id=i,
@@ -88,7 +107,7 @@ class EasyOCREngine:
             lines.append(line)
             tokens.extend(line_tokens)
 
-        mean_conf = float(sum(float(r["conf"]) for r in rows) / max(len(rows), 1)) if rows else 0.0
+        mean_conf = float(confs.mean()) if rows else 0.0
         return OCRExtraction(
             image_path=path,
             image_width=width,
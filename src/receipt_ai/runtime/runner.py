@@ -5,6 +5,7 @@ from pathlib import Path
 
 from src.receipt_ai.config import ReceiptAIConfig
 from src.receipt_ai.model.compatibility import inspect_checkpoint_label_space
+from src.receipt_ai.ocr.easyocr_engine import EasyOCREngine
 from src.receipt_ai.pipelines.entrypoints import run_easyocr_rules, run_hybrid, run_layoutlm_only
 from src.receipt_ai.runtime.policy import RuntimePolicy, apply_runtime_policy, load_runtime_policy
 
@@ -110,13 +111,19 @@ def resolve_mode(
     return requested_mode, resolved_checkpoint, messages
 
 
-def run_extraction(image_path: str | Path, *, mode: str, cfg: ReceiptAIConfig):
+def run_extraction(
+    image_path: str | Path,
+    *,
+    mode: str,
+    cfg: ReceiptAIConfig,
+    ocr_engine: EasyOCREngine | None = None,
+):
     runner = {
         "easyocr_rules": run_easyocr_rules,
         "layoutlm_only": run_layoutlm_only,
         "hybrid": run_hybrid,
     }[mode]
-    return runner(image_path, config=cfg)
+    return runner(image_path, config=cfg, ocr_engine=ocr_engine)
 
 
 def iter_input_images(input_path: str | Path) -> list[Path]:
@@ -1,27 +1,44 @@
 # src/run_sroie_eval.py
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from multiprocessing import get_context
 from pathlib import Path
 import argparse
 import csv
+import io
+import os
 import re
 
 import cv2
+import numpy as np
+from PIL import Image
+
+try:
+    from turbojpeg import TJPF_BGR, TurboJPEG
+except ImportError:
+    TurboJPEG = None
 
 from src.preprocess import preprocess_for_ocr, candidate_modes_for_auto
-from src.ocr_engine import run_easyocr
+from src.ocr_engine import OcrBatch, get_reader, run_easyocr, run_easyocr_batch
 from src.evaluate import char_accuracy, normalize_text
 
+_EXIF_ORIENTATION = 0x0112
+
+# Shared across images so auto mode doesn't spin up fresh threads per page; threads start lazily.
+_PREPROCESS_POOL = ThreadPoolExecutor(max_workers=len(candidate_modes_for_auto()), thread_name_prefix="preprocess")
+
 
-def ocr_text_from_results(results: list[dict]) -> str:
-    parts = [r.get("text", "") for r in results if r.get("text")]
-    return " ".join(parts).strip()
+def ocr_text_from_results(results: OcrBatch) -> str:
+    return " ".join(t for t in results.texts if t).strip()
 
 
-def mean_conf(results: list[dict]) -> float:
-    if not results:
+def mean_conf(results: OcrBatch) -> float:
+    if not len(results):
         return 0.0
-    return sum(float(r.get("conf", 0.0)) for r in results) / max(len(results), 1)
+    return float(results.confs.mean())
 
 
 def text_quality_score(text: str) -> float:
@@ -33,8 +50,10 @@ def text_quality_score(text: str) -> float:
     t = normalize_text(text)
     if not t:
         return 0.0
-    alnum = sum(ch.isalnum() for ch in t)
     length = len(t)
+    # normalize_text keeps only [A-Z0-9 ], so everything but spaces is alphanumeric;
+    # str.count already runs in C, no per-character pass is needed.
+    alnum = length - t.count(" ")
     return (alnum / max(length, 1)) + min(length, 80) / 80.0
 
 
@@ -43,56 +62,85 @@ def load_gt_text(box_txt_path: Path) -> str:
     SROIE v2 'box' ground truth format per line:
       x1,y1,x2,y2,x3,y3,x4,y4,transcription
     """
-    lines = box_txt_path.read_text(encoding="utf-8", errors="ignore").splitlines()
+    lines = box_txt_path.read_bytes().decode("utf-8", "ignore").splitlines()
     texts: list[str] = []
     for line in lines:
         line = line.strip()
         if not line:
             continue
-        parts = line.split(",")
+        # maxsplit=8 leaves commas inside the transcription intact in parts[8]
+        parts = line.split(",", 8)
         if len(parts) < 9:
             continue
-        transcription = ",".join(parts[8:]).strip()
+        transcription = parts[8].strip()
         if transcription:
             texts.append(transcription)
     return "\n".join(texts).strip()
 
 
-def run_ocr_on(img_bgr, mode: str) -> dict:
-    processed, _ = preprocess_for_ocr(img_bgr, mode=mode)
-    results = run_easyocr(processed)
-    text = ocr_text_from_results(results)
-    conf = mean_conf(results)
+@lru_cache(maxsize=4096)
+def _load_gt_cached(path_str: str) -> str:
+    # GT files don't change during a run; repeated lookups (e.g. re-evaluating a sample) skip the parse.
+    return load_gt_text(Path(path_str))
+
+
+def _ocr_out(mode: str, processed, results: OcrBatch) -> dict:
     return {
         "mode": mode,
         "processed": processed,
         "results": results,
-        "text": text,
-        "conf": conf,
+        "text": ocr_text_from_results(results),
+        "conf": mean_conf(results),
     }
 
 
+def run_ocr_on(img_bgr, mode: str, preprocess_opts: dict | None = None) -> dict:
+    processed, _ = preprocess_for_ocr(img_bgr, mode=mode, **(preprocess_opts or {}))
+    return _ocr_out(mode, processed, run_easyocr(processed))
+
+
 def blended_score(conf: float, text: str) -> float:
     # Blend OCR confidence with a light text sanity signal
     return (0.6 * conf) + (0.4 * text_quality_score(text))
 
 
-def choose_best_auto(img_bgr, margin: float = 0.03) -> dict:
+def choose_best_auto(
+    img_bgr,
+    baseline: dict | None = None,
+    margin: float = 0.03,
+    early_exit_conf: float = 0.90,
+    early_exit_score: float | None = None,
+    preprocess_opts: dict | None = None,
+) -> dict:
     """
     Conservative auto:
-    - Baseline is always 'none'
+    - Baseline is always 'none' (pass an already-computed `baseline` with "score" to reuse it)
+    - Keep the baseline outright when its mean OCR confidence >= early_exit_conf, or
+      (if set) its blended score >= early_exit_score
     - Try other candidates (clahe/denoise by default)
     - Switch only if blended score beats baseline by >= margin
+
+    Candidates are preprocessed on a thread pool (OpenCV releases the GIL) and then
+    OCR'd together in a single batched EasyOCR call.
     """
-    baseline = run_ocr_on(img_bgr, "none")
-    baseline["score"] = blended_score(baseline["conf"], baseline["text"])
+    if baseline is None:
+        baseline = run_ocr_on(img_bgr, "none", preprocess_opts)
+        baseline["score"] = blended_score(baseline["conf"], baseline["text"])
+    if baseline["conf"] >= early_exit_conf or (
+        early_exit_score is not None and baseline["score"] >= early_exit_score
+    ):
+        return baseline
+
+    modes = [m for m in candidate_modes_for_auto() if m != "none"]
+    if not modes:
+        return baseline
+    opts = preprocess_opts or {}
+    processed = [img for img, _ in _PREPROCESS_POOL.map(lambda m: preprocess_for_ocr(img_bgr, mode=m, **opts), modes)]
+    outs = [_ocr_out(m, img, res) for m, img, res in zip(modes, processed, run_easyocr_batch(processed))]
 
     best = baseline
 
-    for mode in candidate_modes_for_auto():
-        if mode == "none":
-            continue
-        out = run_ocr_on(img_bgr, mode)
+    for out in outs:
         out["score"] = blended_score(out["conf"], out["text"])
         if out["score"] > best["score"] + margin:
             best = out
@@ -100,14 +148,207 @@ def choose_best_auto(img_bgr, margin: float = 0.03) -> dict:
     return best
 
 
+RESULT_FIELDS = [
+    "file",
+    "mode",
+    "chosen_mode",
+    "margin",
+    "base_char_acc",
+    "pre_char_acc",
+    "delta",
+    "base_conf",
+    "pre_conf",
+    "base_score",
+    "pre_score",
+    "gt_preview",
+    "base_preview",
+    "pre_preview",
+]
+
+
+def _format_row(row: tuple) -> tuple:
+    file, mode, chosen_mode, margin, *metrics, gt_preview, base_preview, pre_preview = row
+    return (
+        file,
+        mode,
+        chosen_mode,
+        "" if margin is None else f"{margin:.2f}",
+        *(f"{x:.4f}" for x in metrics),
+        gt_preview,
+        base_preview,
+        pre_preview,
+    )
+
+
+def _init_worker(workers: int) -> None:
+    # Split the cores between workers so N processes don't oversubscribe them: OpenCV gets one
+    # thread, torch (EasyOCR inference, the dominant cost) gets cores // workers. Each worker
+    # then loads the EasyOCR model once up front instead of on its first image.
+    import torch
+
+    cv2.setNumThreads(1)
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    get_reader()
+
+
+@lru_cache(maxsize=1)
+def _turbojpeg():
+    """Per-process TurboJPEG decoder, or None when PyTurboJPEG/libturbojpeg is unavailable."""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError):
+        return None
+
+
+def _exif_orientation(data: bytes) -> int:
+    """EXIF orientation tag of an encoded image (1 = upright), or 0 when it can't be read."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return int(image.getexif().get(_EXIF_ORIENTATION, 1))
+    except (OSError, ValueError, SyntaxError):
+        return 0
+
+
+def _read_image(img_path: Path) -> np.ndarray | None:
+    """
+    cv2.imread, but JPEGs go through libjpeg-turbo's SIMD decoder when it's installed.
+    TurboJPEG doesn't apply EXIF orientation (imread does), so rotated/unknown files keep
+    the imread path and results don't depend on whether turbojpeg is present.
+    """
+    tj = _turbojpeg() if img_path.suffix.lower() in {".jpg", ".jpeg"} else None
+    if tj is not None:
+        data = img_path.read_bytes()
+        if _exif_orientation(data) == 1:
+            try:
+                return tj.decode(data, pixel_format=TJPF_BGR)
+            except OSError:
+                pass
+    return cv2.imread(str(img_path))
+
+
+def _load_inputs(img_path: Path, gt_dir: Path) -> tuple[np.ndarray, str] | None:
+    """Read (image, GT text) for one sample, or None when either is missing/unreadable."""
+    gt_path = gt_dir / f"{img_path.stem}.txt"
+    if not gt_path.exists():
+        return None
+
+    img = _read_image(img_path)
+    if img is None:
+        return None
+
+    return img, _load_gt_cached(str(gt_path))
+
+
+def _prefetch(items, loader, depth: int = 4):
+    """Yield loader(item) in order while a background thread reads up to `depth` items ahead."""
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as ex:
+        pending = deque()
+        for item in items:
+            pending.append(ex.submit(loader, item))
+            if len(pending) > depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _process_one(
+    img_path: Path,
+    save_example: bool,
+    *,
+    gt_dir: Path,
+    mode: str,
+    margin: float,
+    early_exit_conf: float,
+    early_exit_score: float | None,
+    preprocess_opts: dict | None,
+    out_dir: Path,
+    inputs: tuple[np.ndarray, str] | None = None,
+) -> tuple[tuple, float, float] | None:
+    """
+    Evaluate one image; returns (result row, base_acc, pre_acc) or None when GT/image is missing.
+    `inputs` takes an already-loaded (image, GT text) pair, e.g. from `_prefetch`.
+    """
+    if inputs is None:
+        inputs = _load_inputs(img_path, gt_dir)
+        if inputs is None:
+            return None
+    img, gt_text = inputs
+
+    # Baseline OCR (always none/grayscale)
+    base_out = run_ocr_on(img, mode="none", preprocess_opts=preprocess_opts)
+    base_out["score"] = blended_score(base_out["conf"], base_out["text"])
+    base_text = base_out["text"]
+    base_acc = char_accuracy(base_text, gt_text)
+
+    # Preproc OCR
+    if mode == "auto":
+        pre_out = choose_best_auto(
+            img,
+            baseline=base_out,
+            margin=margin,
+            early_exit_conf=early_exit_conf,
+            early_exit_score=early_exit_score,
+            preprocess_opts=preprocess_opts,
+        )
+        chosen_mode = pre_out["mode"]
+    else:
+        pre_out = run_ocr_on(img, mode=mode, preprocess_opts=preprocess_opts)
+        pre_out["score"] = blended_score(pre_out["conf"], pre_out["text"])
+        chosen_mode = mode
+
+    pre_text = pre_out["text"]
+    pre_acc = char_accuracy(pre_text, gt_text)
+
+    delta = pre_acc - base_acc
+
+    # Raw values in RESULT_FIELDS order; _format_row renders them when the CSV is written.
+    row = (
+        img_path.name,
+        mode,
+        chosen_mode,
+        margin if mode == "auto" else None,
+        base_acc,
+        pre_acc,
+        delta,
+        base_out["conf"],
+        pre_out["conf"],
+        base_out["score"],
+        pre_out["score"],
+        normalize_text(gt_text)[:160],
+        normalize_text(base_text)[:160],
+        normalize_text(pre_text)[:160],
+    )
+
+    if save_example:
+        cv2.imwrite(str(out_dir / f"{img_path.stem}_processed_{chosen_mode}.png"), pre_out["processed"])
+
+    return row, base_acc, pre_acc
+
+
 def eval_split(
     img_dir: Path,
     gt_dir: Path,
     mode: str,
     margin: float,
     max_images: int | None = None,
+    early_exit_conf: float = 0.90,
+    early_exit_score: float | None = None,
+    preprocess_opts: dict | None = None,
     save_examples: bool = False,
-):
+    workers: int = 1,
+    out_csv: Path | None = None,
+) -> tuple[int, float, float]:
+    """
+    Evaluate baseline vs preprocessing on one split. Rows are streamed to `out_csv`
+    (if given) as images finish; returns (samples evaluated, base mean, preproc mean).
+    `preprocess_opts` are extra keyword arguments for every preprocess_for_ocr call.
+
+    workers > 1 evaluates images in a spawned process pool. Every worker imports torch and
+    loads its own EasyOCR reader, so memory grows by a full model (several hundred MB) per
+    worker; lower `workers` on memory-constrained machines.
+    """
     image_exts = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
 
     if not img_dir.exists():
@@ -121,88 +362,95 @@ def eval_split(
     if max_images is not None:
         images = images[:max_images]
 
-    rows: list[dict] = []
+    n = 0
     improved = 0
+    base_sum = 0.0
+    pre_sum = 0.0
 
     out_dir = Path("outputs") / f"sroie_{img_dir.parent.name}_{mode}"
     if mode == "auto":
         # include margin in folder name to avoid overwriting when you sweep margins
         out_dir = Path("outputs") / f"sroie_{img_dir.parent.name}_{mode}_m{margin:.2f}"
+    if (preprocess_opts or {}).get("green_channel"):
+        out_dir = out_dir.with_name(out_dir.name + "_green")
     if save_examples:
         out_dir.mkdir(parents=True, exist_ok=True)
 
-    for idx, img_path in enumerate(images, start=1):
-        gt_path = gt_dir / f"{img_path.stem}.txt"
-        if not gt_path.exists():
-            continue
-
-        img = cv2.imread(str(img_path))
-        if img is None:
-            continue
-
-        gt_text = load_gt_text(gt_path)
-
-        # Baseline OCR (always none/grayscale)
-        base_out = run_ocr_on(img, mode="none")
-        base_out["score"] = blended_score(base_out["conf"], base_out["text"])
-        base_text = base_out["text"]
-        base_acc = char_accuracy(base_text, gt_text)
-
-        # Preproc OCR
-        if mode == "auto":
-            pre_out = choose_best_auto(img, margin=margin)
-            chosen_mode = pre_out["mode"]
-        else:
-            pre_out = run_ocr_on(img, mode=mode)
-            pre_out["score"] = blended_score(pre_out["conf"], pre_out["text"])
-            chosen_mode = mode
-
-        pre_text = pre_out["text"]
-        pre_acc = char_accuracy(pre_text, gt_text)
-
-        delta = pre_acc - base_acc
-        if delta > 0:
-            improved += 1
-
-        rows.append(
-            {
-                "file": img_path.name,
-                "mode": mode,
-                "chosen_mode": chosen_mode,
-                "margin": f"{margin:.2f}" if mode == "auto" else "",
-                "base_char_acc": f"{base_acc:.4f}",
-                "pre_char_acc": f"{pre_acc:.4f}",
-                "delta": f"{delta:.4f}",
-                "base_conf": f"{base_out['conf']:.4f}",
-                "pre_conf": f"{pre_out['conf']:.4f}",
-                "base_score": f"{base_out['score']:.4f}",
-                "pre_score": f"{pre_out['score']:.4f}",
-                "gt_preview": normalize_text(gt_text)[:160],
-                "base_preview": normalize_text(base_text)[:160],
-                "pre_preview": normalize_text(pre_text)[:160],
-            }
+    task = partial(
+        _process_one,
+        gt_dir=gt_dir,
+        mode=mode,
+        margin=margin,
+        early_exit_conf=early_exit_conf,
+        early_exit_score=early_exit_score,
+        preprocess_opts=preprocess_opts,
+        out_dir=out_dir,
+    )
+    save_flags = [save_examples and idx <= 10 for idx in range(1, len(images) + 1)]
+    if workers > 1 and len(images) > workers:
+        # Largest files first (longest-processing-time-first), so the pool doesn't end on a
+        # straggler big receipt. The subset and its example flags are fixed above in name order.
+        order = sorted(range(len(images)), key=lambda i: images[i].stat().st_size, reverse=True)
+        images = [images[i] for i in order]
+        save_flags = [save_flags[i] for i in order]
+
+    csv_file = None
+    writer = None
+    if out_csv is not None:
+        out_csv.parent.mkdir(parents=True, exist_ok=True)
+        csv_file = out_csv.open("w", newline="", encoding="utf-8")
+        writer = csv.writer(csv_file)
+        writer.writerow(RESULT_FIELDS)
+
+    # spawn: workers must not inherit torch/OpenCV thread pools from a forked parent
+    pool = (
+        ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(workers,),
         )
-
-        if save_examples and idx <= 10:
-            cv2.imwrite(str(out_dir / f"{img_path.stem}_processed_{chosen_mode}.png"), pre_out["processed"])
-
-        if idx % 50 == 0:
-            print(f"[{img_dir.parent.name} | {mode}] processed {idx}/{len(images)}...")
-
-    def mean(vals: list[str]) -> float:
-        xs = [float(v) for v in vals]
-        return sum(xs) / max(len(xs), 1)
-
-    base_mean = mean([r["base_char_acc"] for r in rows]) if rows else 0.0
-    pre_mean = mean([r["pre_char_acc"] for r in rows]) if rows else 0.0
+        if workers > 1
+        else None
+    )
+    try:
+        if pool is not None:
+            results = pool.map(task, images, save_flags, chunksize=4)
+        else:
+            # In-process: overlap disk reads of the next images with OCR on the current one.
+            prefetched = _prefetch(images, partial(_load_inputs, gt_dir=gt_dir))
+            results = (
+                task(img_path, save_flag, inputs=inputs) if inputs is not None else None
+                for img_path, save_flag, inputs in zip(images, save_flags, prefetched)
+            )
+        for idx, result in enumerate(results, start=1):
+            if result is not None:
+                row, base_acc, pre_acc = result
+                if writer is not None:
+                    writer.writerow(_format_row(row))
+                n += 1
+                base_sum += base_acc
+                pre_sum += pre_acc
+                improved += int(pre_acc > base_acc)
+
+            if idx % 50 == 0:
+                print(f"[{img_dir.parent.name} | {mode}] processed {idx}/{len(images)}...")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if csv_file is not None:
+            csv_file.close()
+
+    base_mean = base_sum / n if n else 0.0
+    pre_mean = pre_sum / n if n else 0.0
 
     print(f"\n=== {img_dir.parent.name.upper()} SUMMARY (mode={mode}) ===")
-    print(f"Samples evaluated: {len(rows)}")
+    print(f"Samples evaluated: {n}")
     print(f"Mean char accuracy (baseline): {base_mean:.4f}")
     print(f"Mean char accuracy (preproc):  {pre_mean:.4f}")
-    print(f"Improved cases: {improved}/{len(rows)}")
+    print(f"Improved cases: {improved}/{n}")
 
-    return rows, base_mean, pre_mean
+    return n, base_mean, pre_mean
 
 
 def main():
@@ -215,51 +463,72 @@ def main():
         help="Preprocessing mode. 'auto' tries multiple and picks best by blended score.",
     )
     p.add_argument("--margin", type=float, default=0.03, help="Auto-mode switch margin (lower = more switching).")
+    p.add_argument(
+        "--early_exit_conf",
+        type=float,
+        default=0.90,
+        help="Auto-mode keeps the baseline without trying other modes when its mean OCR confidence reaches this (>1 disables).",
+    )
+    p.add_argument(
+        "--early_exit_score",
+        type=float,
+        default=None,
+        help="Auto-mode also keeps the baseline when its blended score (0-1.4 scale) reaches this. Off by default.",
+    )
+    p.add_argument(
+        "--green_channel",
+        action="store_true",
+        help="Use the green plane instead of a luma conversion as the grayscale image (all modes).",
+    )
+    p.add_argument(
+        "--fused_threshold",
+        action="store_true",
+        help="Adaptive mode: use the fused Numba threshold+close kernel (needs numba; same output).",
+    )
     p.add_argument("--max", type=int, default=200, help="Limit number of images for a quick run.")
     p.add_argument("--save_examples", action="store_true", help="Save first 10 processed images to outputs/.")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=max((os.cpu_count() or 2) // 2, 1),
+        help=(
+            "Worker processes. Each loads its own torch + EasyOCR model (several hundred MB of RAM "
+            "apiece) and gets cpu_count // workers torch threads. 1 runs in-process."
+        ),
+    )
     args = p.parse_args()
 
+    # With a process pool the parallelism is across images (each worker pins OpenCV to one
+    # thread and torch to its share of the cores in _init_worker); in-process, let OpenCV use
+    # every core within an image.
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(1 if args.workers > 1 else (os.cpu_count() or 1))
+
     root = Path("data") / "sroie_v2" / args.split
     img_dir = root / "img"
     gt_dir = root / "box"
 
-    rows, base_mean, pre_mean = eval_split(
+    out_csv = Path("outputs") / f"sroie_{args.split}_{args.mode}_results.csv"
+    if args.mode == "auto":
+        out_csv = Path("outputs") / f"sroie_{args.split}_{args.mode}_m{args.margin:.2f}_results.csv"
+    if args.green_channel:
+        # separate file so a green-channel run can be compared against the luma one
+        out_csv = out_csv.with_name(out_csv.stem.replace("_results", "_green_results") + ".csv")
+
+    _, base_mean, pre_mean = eval_split(
         img_dir=img_dir,
         gt_dir=gt_dir,
         mode=args.mode,
         margin=args.margin,
         max_images=args.max,
+        early_exit_conf=args.early_exit_conf,
+        early_exit_score=args.early_exit_score,
+        preprocess_opts={"green_channel": args.green_channel, "fused_threshold": args.fused_threshold},
         save_examples=args.save_examples,
+        workers=args.workers,
+        out_csv=out_csv,
     )
 
-    out_csv = Path("outputs") / f"sroie_{args.split}_{args.mode}_results.csv"
-    if args.mode == "auto":
-        out_csv = Path("outputs") / f"sroie_{args.split}_{args.mode}_m{args.margin:.2f}_results.csv"
-    out_csv.parent.mkdir(exist_ok=True)
-
-    fieldnames = list(rows[0].keys()) if rows else [
-        "file",
-        "mode",
-        "chosen_mode",
-        "margin",
-        "base_char_acc",
-        "pre_char_acc",
-        "delta",
-        "base_conf",
-        "pre_conf",
-        "base_score",
-        "pre_score",
-        "gt_preview",
-        "base_preview",
-        "pre_preview",
-    ]
-
-    with out_csv.open("w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-
     print(f"\nSaved results CSV: {out_csv}")
     print(
         f"Split: {args.split} | mode={args.mode}"